@@ -2,7 +2,7 @@ from fastapi import APIRouter, UploadFile, File, BackgroundTasks, HTTPException
 from typing import List
 import uuid
 import boto3
-from ..services.document_processor import DocumentProcessor
+from services.document_processor.processor import DocumentProcessor
 from ..models.document import DocumentUploadResponse
 
 router = APIRouter()
@@ -0,0 +1,73 @@
+"""
+Compare the binary search cache format against the legacy JSON entries.
+
+    python -m scripts.benchmark_result_cache
+"""
+import dataclasses
+import json
+import random
+import timeit
+from services.embedding_service.vector_store import VectorSearchResult
+from services.retrieval_service.result_cache import (
+    CODEC_LZ4,
+    CODEC_NONE,
+    CODEC_ZLIB,
+    decode_cache_entry,
+    encode_results,
+    lz4,
+)
+
+WORDS = [f"term{i}" for i in range(5000)]
+
+
+def make_results(top_k: int, rng: random.Random):
+    results = []
+    for i in range(top_k):
+        # ~1000 characters, the default IntelligentChunker chunk size
+        text = " ".join(rng.choices(WORDS, k=110))[:1000]
+        results.append(VectorSearchResult(
+            id=f"{rng.getrandbits(128):032x}",
+            score=1.0 - i / 100,
+            metadata={
+                "document_id": f"{rng.getrandbits(128):032x}",
+                "chunk_index": i,
+                "text": text,
+                "position": i,
+                "total_chunks": 40
+            },
+            text=text
+        ))
+    return results
+
+
+def best_of(stmt, number: int = 2000, repeat: int = 5) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e6
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{'format':<12}{'top_k':>6}{'bytes':>9}{'encode us':>11}{'hit us':>9}{'hit+meta us':>13}")
+    for top_k in (10, 50):
+        results = make_results(top_k, rng)
+
+        legacy = json.dumps([dataclasses.asdict(r) for r in results])
+        hit = best_of(lambda: decode_cache_entry(legacy))
+        print(f"{'json':<12}{top_k:>6}{len(legacy):>9}{'':>11}{hit:>9.1f}{hit:>13.1f}")
+
+        codecs = [("none", CODEC_NONE), ("zlib", CODEC_ZLIB)]
+        if lz4 is not None:
+            codecs.append(("lz4", CODEC_LZ4))
+
+        for name, codec in codecs:
+            data = encode_results(results, codec)
+            encode = best_of(lambda: encode_results(results, codec), number=500)
+            hit = best_of(lambda: decode_cache_entry(data))
+            hit_meta = best_of(lambda: [r.metadata for r in decode_cache_entry(data)])
+            print(
+                f"{name:<12}{top_k:>6}{len(data):>9}"
+                f"{encode:>11.1f}{hit:>9.1f}{hit_meta:>13.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+from typing import List, Dict, Any, Optional, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+import hashlib
+import zlib
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_SIGNATURE_DTYPES = {8: np.uint8, 16: np.uint16, 32: np.uint32}
+
+
+def _integrate(f, lower: float, upper: float, steps: int = 200) -> float:
+    width = (upper - lower) / steps
+    points = lower + (np.arange(steps) + 0.5) * width
+    return float(np.sum(f(points)) * width)
+
+
+@lru_cache(maxsize=None)
+def _optimal_bands(
+    num_perm: int,
+    threshold: float,
+    false_positive_weight: float,
+    false_negative_weight: float
+) -> Tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows <= num_perm minimising the weighted
+    false positive and false negative areas under the LSH S-curve, as
+    datasketch does
+    """
+    best = None
+    for bands in range(1, num_perm + 1):
+        for rows in range(1, num_perm // bands + 1):
+            false_positive = _integrate(
+                lambda s: 1 - (1 - s ** rows) ** bands, 0.0, threshold
+            )
+            false_negative = _integrate(
+                lambda s: (1 - s ** rows) ** bands, threshold, 1.0
+            )
+            error = (
+                false_positive_weight * false_positive
+                + false_negative_weight * false_negative
+            )
+            if best is None or error < best[0]:
+                best = (error, bands, rows)
+    return best[1], best[2]
+
+
+def merge_signatures(signatures: List[np.ndarray]) -> Optional[np.ndarray]:
+    """
+    MinHash signature of the union of the texts behind the given signatures,
+    e.g. a document signature built from its chunk signatures
+    """
+    if not signatures:
+        return None
+    return np.minimum.reduce(signatures)
+
+
+class MinHasher:
+    def __init__(
+        self,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 1,
+        block_size: int = 1024
+    ):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Shingles are permuted block_size at a time so peak memory stays at
+        # a few block_size x num_perm arrays however long the text is
+        self.block_size = block_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        tokens = text.lower().split()
+        k = self.shingle_size
+        if len(tokens) <= k:
+            shingles = [" ".join(tokens)] if tokens else []
+        else:
+            shingles = (" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1))
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64
+        )
+        return np.unique(hashes)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        Compute the MinHash signature of a text, or None if it has no tokens
+        """
+        hashes = self._shingle_hashes(text)
+        if not len(hashes):
+            return None
+
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        for start in range(0, len(hashes), self.block_size):
+            block = hashes[start:start + self.block_size, None]
+            # Universal hashing (a*x + b) mod p; uint64 overflow wraps, as in datasketch
+            permuted = ((block * self.a + self.b) % _MERSENNE_PRIME) & _MAX_HASH
+            np.minimum(signature, permuted.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+
+@dataclass
+class Fingerprint:
+    item_id: str
+    signature: Optional[bytes]
+    band_keys: List[bytes] = field(default_factory=list)
+    duplicate_of: Optional[str] = None
+
+
+class InMemoryLSHIndex:
+    """
+    Process-local LSH index for tests and small corpora. Every bucket keeps
+    up to max_bucket_size ids, and all signatures live in process memory,
+    so it does not scale to large corpora; use RedisLSHIndex in production.
+    """
+    def __init__(self, max_bucket_size: int = 4):
+        self.max_bucket_size = max_bucket_size
+        self.buckets: Dict[str, Dict[Tuple[int, bytes], List[str]]] = {}
+        self.signatures: Dict[str, Dict[str, bytes]] = {}
+
+    def get_candidates(
+        self,
+        namespace: str,
+        band_keys_list: List[List[bytes]]
+    ) -> List[List[str]]:
+        buckets = self.buckets.get(namespace, {})
+        return [
+            [
+                item_id
+                for band, key in enumerate(band_keys)
+                for item_id in buckets.get((band, key), ())
+            ]
+            for band_keys in band_keys_list
+        ]
+
+    def get_signatures(
+        self,
+        namespace: str,
+        item_ids: List[str]
+    ) -> List[Optional[bytes]]:
+        signatures = self.signatures.get(namespace, {})
+        return [signatures.get(item_id) for item_id in item_ids]
+
+    def add(self, namespace: str, entries: List[Tuple[str, List[bytes], bytes]]):
+        buckets = self.buckets.setdefault(namespace, {})
+        signatures = self.signatures.setdefault(namespace, {})
+        for item_id, band_keys, signature in entries:
+            signatures[item_id] = signature
+            for band, key in enumerate(band_keys):
+                bucket = buckets.setdefault((band, key), [])
+                # Drop ids whose signature was removed
+                bucket[:] = [i for i in bucket if i in signatures]
+                if item_id not in bucket and len(bucket) < self.max_bucket_size:
+                    bucket.append(item_id)
+
+    def remove(self, namespace: str, item_ids: List[str]):
+        signatures = self.signatures.get(namespace, {})
+        for item_id in item_ids:
+            signatures.pop(item_id, None)
+
+
+class RedisLSHIndex:
+    """
+    Redis-backed LSH index shared across workers, meant for production.
+    Band buckets and signatures are spread over `shards` hashes per
+    namespace so Redis Cluster can distribute them. Each batch lookup is
+    one pipelined round trip; registering a batch is one, plus up to two
+    more when it takes over stale claims. Each bucket holds only the first
+    item that claimed it (HSETNX), which keeps memory at one field per band
+    per item; a bucket held by an item that is not a near-duplicate can hide
+    a true match in that band, which the remaining bands usually recover.
+    """
+    def __init__(self, redis_client, prefix: str = "lsh", shards: int = 1024):
+        # Expects a synchronous redis.Redis client with decode_responses=False
+        self.redis = redis_client
+        self.prefix = prefix
+        self.shards = shards
+
+    def _band_key(self, namespace: str, band: int, key: bytes) -> str:
+        shard = int.from_bytes(key[:4], "big") % self.shards
+        return f"{self.prefix}:{namespace}:band:{band}:{shard}"
+
+    def _signature_key(self, namespace: str, item_id: str) -> str:
+        shard = zlib.crc32(item_id.encode()) % self.shards
+        return f"{self.prefix}:{namespace}:sig:{shard}"
+
+    def get_candidates(
+        self,
+        namespace: str,
+        band_keys_list: List[List[bytes]]
+    ) -> List[List[str]]:
+        pipe = self.redis.pipeline(transaction=False)
+        for band_keys in band_keys_list:
+            for band, key in enumerate(band_keys):
+                pipe.hget(self._band_key(namespace, band, key), key)
+        replies = iter(pipe.execute())
+
+        return [
+            [
+                owner.decode()
+                for owner in (next(replies) for _ in band_keys)
+                if owner is not None
+            ]
+            for band_keys in band_keys_list
+        ]
+
+    def get_signatures(
+        self,
+        namespace: str,
+        item_ids: List[str]
+    ) -> List[Optional[bytes]]:
+        if not item_ids:
+            return []
+
+        shards: Dict[str, List[str]] = {}
+        for item_id in dict.fromkeys(item_ids):
+            shards.setdefault(self._signature_key(namespace, item_id), []).append(item_id)
+
+        pipe = self.redis.pipeline(transaction=False)
+        for key, ids in shards.items():
+            pipe.hmget(key, ids)
+
+        found = {}
+        for ids, values in zip(shards.values(), pipe.execute()):
+            found.update(zip(ids, values))
+        return [found[item_id] for item_id in item_ids]
+
+    def add(self, namespace: str, entries: List[Tuple[str, List[bytes], bytes]]):
+        """
+        Store signatures and claim buckets. Claims held by items whose
+        signature has been removed are taken over.
+        """
+        if not entries:
+            return
+
+        claims = []
+        pipe = self.redis.pipeline(transaction=False)
+        for item_id, band_keys, _ in entries:
+            for band, key in enumerate(band_keys):
+                band_key = self._band_key(namespace, band, key)
+                pipe.hsetnx(band_key, key, item_id)
+                pipe.hget(band_key, key)
+                claims.append((band_key, key, item_id))
+        for item_id, _, signature in entries:
+            pipe.hset(self._signature_key(namespace, item_id), item_id, signature)
+        replies = pipe.execute()
+
+        lost = []
+        for claim, claimed, owner in zip(claims, replies[0::2], replies[1::2]):
+            owner = owner.decode() if owner is not None else None
+            if not claimed and owner is not None and owner != claim[2]:
+                lost.append((claim, owner))
+        if not lost:
+            return
+
+        owners = list(dict.fromkeys(owner for _, owner in lost))
+        stale = {
+            owner
+            for owner, signature in zip(owners, self.get_signatures(namespace, owners))
+            if signature is None
+        }
+        if not stale:
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        for (band_key, key, item_id), owner in lost:
+            if owner in stale:
+                pipe.hset(band_key, key, item_id)
+        pipe.execute()
+
+    def remove(self, namespace: str, item_ids: List[str]):
+        """
+        Remove signatures; their bucket claims are skipped on lookup and
+        taken over by the next item that lands in the bucket
+        """
+        if not item_ids:
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        for item_id in item_ids:
+            pipe.hdel(self._signature_key(namespace, item_id), item_id)
+        pipe.execute()
+
+
+class NearDuplicateDetector:
+    """
+    MinHash/LSH near-duplicate detection in two steps: find_duplicates looks
+    a batch up without changing the index, and register adds the items once
+    they are stored. Workers ingesting copies of the same content at the
+    same time can both miss each other and both index it.
+    """
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        signature_bits: int = 16,
+        false_positive_weight: float = 0.05,
+        false_negative_weight: float = 0.95,
+        index=None
+    ):
+        if signature_bits not in _SIGNATURE_DTYPES:
+            raise ValueError(f"signature_bits must be one of {sorted(_SIGNATURE_DTYPES)}")
+
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        # Candidates are verified against stored signatures, so false
+        # positives are cheap and the band layout is weighted towards recall
+        self.bands, self.rows = _optimal_bands(
+            num_perm, threshold, false_positive_weight, false_negative_weight
+        )
+        self.signature_dtype = _SIGNATURE_DTYPES[signature_bits]
+        self.collision_rate = 2.0 ** -signature_bits
+        self.index = index or InMemoryLSHIndex()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        return self.hasher.signature(text)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        bands = signature[:self.bands * self.rows].reshape(self.bands, self.rows)
+        return [
+            hashlib.blake2b(band.tobytes(), digest_size=8).digest()
+            for band in bands
+        ]
+
+    def similarity(self, a: bytes, b: bytes) -> float:
+        """
+        Estimate Jaccard similarity from two stored b-bit signatures
+        """
+        matches = np.mean(
+            np.frombuffer(a, dtype=self.signature_dtype)
+            == np.frombuffer(b, dtype=self.signature_dtype)
+        )
+        return float((matches - self.collision_rate) / (1 - self.collision_rate))
+
+    def fingerprint(self, item_id: str, signature: Optional[np.ndarray]) -> Fingerprint:
+        if signature is None:
+            return Fingerprint(item_id, None)
+        return Fingerprint(
+            item_id,
+            signature.astype(self.signature_dtype).tobytes(),
+            self._band_keys(signature)
+        )
+
+    def find_duplicates(
+        self,
+        items: List[Tuple[str, Optional[np.ndarray]]],
+        namespace: str = "chunk"
+    ) -> List[Fingerprint]:
+        """
+        Fingerprint (item_id, signature) pairs and set duplicate_of to the
+        most similar registered item or earlier item of the same batch.
+        Costs two index round trips per batch and registers nothing.
+        """
+        fingerprints = [self.fingerprint(item_id, s) for item_id, s in items]
+        hashed = [fp for fp in fingerprints if fp.signature is not None]
+
+        candidates = self.index.get_candidates(namespace, [fp.band_keys for fp in hashed])
+        candidate_ids = list(dict.fromkeys(c for ids in candidates for c in ids))
+        known = dict(zip(candidate_ids, self.index.get_signatures(namespace, candidate_ids)))
+
+        batch_buckets: Dict[Tuple[int, bytes], List[Fingerprint]] = {}
+        for fp, ids in zip(hashed, candidates):
+            options = [(c, known[c]) for c in dict.fromkeys(ids) if c != fp.item_id]
+            options += [
+                (other.item_id, other.signature)
+                for band, key in enumerate(fp.band_keys)
+                for other in batch_buckets.get((band, key), ())
+            ]
+
+            best_similarity = self.threshold
+            for candidate, stored in options:
+                if stored is None:
+                    continue
+                similarity = self.similarity(fp.signature, stored)
+                if similarity >= best_similarity:
+                    fp.duplicate_of, best_similarity = candidate, similarity
+
+            if fp.duplicate_of is None:
+                for band, key in enumerate(fp.band_keys):
+                    batch_buckets.setdefault((band, key), []).append(fp)
+
+        return fingerprints
+
+    def register(self, fingerprints: List[Fingerprint], namespace: str = "chunk"):
+        """
+        Add stored items to the index so later copies link to them
+        """
+        self.index.add(namespace, [
+            (fp.item_id, fp.band_keys, fp.signature)
+            for fp in fingerprints
+            if fp.signature is not None
+        ])
+
+    def forget(self, item_ids: List[str], namespace: str = "chunk"):
+        """
+        Stop linking to items that are not in the vector store
+        """
+        self.index.remove(namespace, item_ids)
+
+
+def partition_duplicates(
+    chunks: List[Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Split chunks into those that need embedding and those linked to an
+    already indexed chunk via metadata["duplicate_of"]
+    """
+    unique = [c for c in chunks if not c["metadata"].get("duplicate_of")]
+    duplicates = [c for c in chunks if c["metadata"].get("duplicate_of")]
+    return unique, duplicates
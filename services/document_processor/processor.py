@@ -0,0 +1,112 @@
+import os
+from typing import List, Dict, Any, Optional
+import boto3
+import redis
+from .chunker import IntelligentChunker
+from .deduplicator import NearDuplicateDetector, RedisLSHIndex, merge_signatures
+from ..embedding_service.generator import EmbeddingGenerator
+from ..embedding_service.vector_store import VectorStore
+
+class DocumentProcessor:
+    def __init__(
+        self,
+        chunker: Optional[IntelligentChunker] = None,
+        embedding_generator: Optional[EmbeddingGenerator] = None,
+        vector_store: Optional[VectorStore] = None,
+        deduplicator: Optional[NearDuplicateDetector] = None,
+        s3_client=None,
+        bucket: str = "genai-knowledge-bucket"
+    ):
+        self.chunker = chunker or IntelligentChunker()
+        self.embedding_generator = embedding_generator or EmbeddingGenerator()
+        self.vector_store = vector_store or VectorStore()
+        self.deduplicator = deduplicator or self._deduplicator_from_env()
+        self.s3_client = s3_client or boto3.client('s3')
+        self.bucket = bucket
+
+    @staticmethod
+    def _deduplicator_from_env() -> Optional[NearDuplicateDetector]:
+        """
+        Build near-duplicate detection from DEDUP_REDIS_URL and
+        DEDUP_THRESHOLD. Without a Redis URL dedup is off, since a
+        process-local index would only see this worker's documents.
+        """
+        redis_url = os.getenv("DEDUP_REDIS_URL")
+        if not redis_url:
+            return None
+
+        return NearDuplicateDetector(
+            threshold=float(os.getenv("DEDUP_THRESHOLD", "0.85")),
+            index=RedisLSHIndex(redis.Redis.from_url(redis_url))
+        )
+
+    async def process_document(
+        self,
+        doc_id: str,
+        s3_key: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Fetch an uploaded document from S3 and index it
+        """
+        response = self.s3_client.get_object(Bucket=self.bucket, Key=s3_key)
+        # Only plain text extraction exists so far
+        text = response['Body'].read().decode("utf-8", errors="replace")
+        return await self.process_text(doc_id, text, metadata)
+
+    async def process_text(
+        self,
+        doc_id: str,
+        text: str,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Chunk, deduplicate, embed and store a document
+        """
+        chunks = self.chunker.chunk_document(text, doc_id)
+        for chunk in chunks:
+            chunk["metadata"].update(metadata or {})
+
+        if self.deduplicator is None:
+            embeddings = await self.embedding_generator.generate_embeddings(
+                [c["text"] for c in chunks]
+            )
+            await self.vector_store.upsert_embeddings(embeddings, chunks)
+            return {"document_id": doc_id, "chunks": len(chunks), "duplicates": 0}
+
+        signatures = [self.deduplicator.signature(c["text"]) for c in chunks]
+        chunk_fingerprints = self.deduplicator.find_duplicates(
+            [(c["chunk_id"], s) for c, s in zip(chunks, signatures)]
+        )
+        # The document signature is merged from its chunks rather than
+        # hashing the full text again
+        (document_fingerprint,) = self.deduplicator.find_duplicates(
+            [(doc_id, merge_signatures([s for s in signatures if s is not None]))],
+            namespace="document"
+        )
+
+        for chunk, fingerprint in zip(chunks, chunk_fingerprints):
+            if fingerprint.duplicate_of:
+                chunk["metadata"]["duplicate_of"] = fingerprint.duplicate_of
+            if document_fingerprint.duplicate_of:
+                chunk["metadata"]["duplicate_of_document"] = document_fingerprint.duplicate_of
+
+        stored, missing = await self.vector_store.upsert_chunks(
+            chunks, self.embedding_generator.generate_embeddings
+        )
+
+        # Register only once vectors are stored, so the index never points
+        # at chunks that failed to embed or upsert
+        stored_ids = {c["chunk_id"] for c in stored}
+        self.deduplicator.forget(missing)
+        self.deduplicator.register(
+            [fp for fp in chunk_fingerprints if fp.item_id in stored_ids]
+        )
+        if not document_fingerprint.duplicate_of:
+            self.deduplicator.register([document_fingerprint], namespace="document")
+
+        return {
+            "document_id": doc_id,
+            "chunks": len(chunks),
+            "duplicates": len(chunks) - len(stored)
+        }
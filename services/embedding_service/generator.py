@@ -1,3 +1,4 @@
+import os
 import openai
 from sentence_transformers import SentenceTransformer
 import numpy as np
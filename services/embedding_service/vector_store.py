@@ -1,10 +1,18 @@
+import os
 import pinecone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
 import numpy as np
 from dataclasses import dataclass
+from ..document_processor.deduplicator import partition_duplicates
+
+# Caps the duplicate lists kept on an entry so boilerplate chunks repeated
+# across many documents stay under the metadata size limit
+MAX_LINKED_DUPLICATES = 100
 
 @dataclass
 class VectorSearchResult:
+    __slots__ = ("id", "score", "metadata", "text")
+    
     id: str
     score: float
     metadata: Dict[str, Any]
@@ -57,6 +65,82 @@ class VectorStore:
             batch = vectors[i:i + batch_size]
             self.index.upsert(vectors=batch, namespace=namespace)
     
+    async def upsert_chunks(
+        self,
+        chunks: List[Dict[str, Any]],
+        embed: Callable[[List[str]], Awaitable[List[np.ndarray]]],
+        namespace: Optional[str] = None
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Embed and store chunks, linking near-duplicates to the entries
+        they duplicate instead of embedding them again. Returns the chunks
+        stored as vectors and the duplicate targets that were missing.
+        """
+        unique, duplicates = partition_duplicates(chunks)
+        
+        if unique:
+            embeddings = await embed([c["text"] for c in unique])
+            await self.upsert_embeddings(embeddings, unique, namespace)
+        
+        # Duplicates whose target is not in the store are indexed normally
+        unlinked = await self.link_duplicates(duplicates, namespace)
+        missing = list(dict.fromkeys(c["metadata"].pop("duplicate_of") for c in unlinked))
+        if unlinked:
+            embeddings = await embed([c["text"] for c in unlinked])
+            await self.upsert_embeddings(embeddings, unlinked, namespace)
+        
+        return unique + unlinked, missing
+    
+    async def link_duplicates(
+        self,
+        duplicates: List[Dict[str, Any]],
+        namespace: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Record duplicate chunks on the existing entries they duplicate.
+        Returns the chunks whose target entry was not found.
+        
+        The link lists are read with fetch and written back with update,
+        so two workers linking to the same entry at the same time can drop
+        each other's additions. The lists are best-effort provenance;
+        duplicate detection itself only relies on the LSH index.
+        """
+        links: Dict[str, List[Dict[str, Any]]] = {}
+        for chunk in duplicates:
+            links.setdefault(chunk["metadata"]["duplicate_of"], []).append(chunk)
+        
+        unlinked = []
+        existing_ids = list(links)
+        batch_size = 100
+        for i in range(0, len(existing_ids), batch_size):
+            batch = existing_ids[i:i + batch_size]
+            fetched = self.index.fetch(ids=batch, namespace=namespace)["vectors"]
+            
+            for existing_id in batch:
+                if existing_id not in fetched:
+                    unlinked.extend(links[existing_id])
+                    continue
+                
+                metadata = fetched[existing_id].get("metadata", {})
+                chunk_ids = list(metadata.get("duplicate_chunk_ids", []))
+                document_ids = list(metadata.get("duplicate_document_ids", []))
+                for chunk in links[existing_id]:
+                    if chunk["chunk_id"] not in chunk_ids:
+                        chunk_ids.append(chunk["chunk_id"])
+                    if chunk["document_id"] not in document_ids:
+                        document_ids.append(chunk["document_id"])
+                
+                self.index.update(
+                    id=existing_id,
+                    set_metadata={
+                        "duplicate_chunk_ids": chunk_ids[:MAX_LINKED_DUPLICATES],
+                        "duplicate_document_ids": document_ids[:MAX_LINKED_DUPLICATES]
+                    },
+                    namespace=namespace
+                )
+        
+        return unlinked
+    
     async def search(
         self,
         query_embedding: np.ndarray,
@@ -0,0 +1,233 @@
+from typing import List, Dict, Any, Optional, Union
+import json
+import struct
+import zlib
+from ..embedding_service.vector_store import VectorSearchResult
+
+try:
+    import lz4.block
+except ImportError:  # optional, zlib is used instead
+    lz4 = None
+
+# Binary cache layout (version 2):
+#   header:  magic (3s) | version (B) | codec (B)
+#   payload: compressed with the codec named in the header
+#     count (I) | strings len (I) | metadata len (I)
+#     count records: flags (B) | score (d) | id chars (I) | text chars (I)
+#     strings: ids and texts of all results as one UTF-8 blob
+#     metadata: compact-JSON array with one object per result
+# Strings and metadata are decoded in one call each rather than per result,
+# and metadata only when first accessed. The chunk text is stored once;
+# metadata["text"] is dropped on write and restored on read when
+# FLAG_TEXT_IN_METADATA is set.
+CACHE_MAGIC = b"SRC"
+CACHE_VERSION = 2
+FLAG_TEXT_IN_METADATA = 0x01
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_LZ4 = 2
+# Entries are written once per miss and read on every hit, so the codec is
+# picked for decompression speed: lz4 inflates several times faster than
+# zlib at a modestly larger size (see scripts/benchmark_result_cache.py)
+DEFAULT_CODEC = CODEC_LZ4 if lz4 is not None else CODEC_ZLIB
+ZLIB_LEVEL = 1
+
+_CORRUPT_ERRORS = (zlib.error, struct.error, UnicodeDecodeError)
+if lz4 is not None:
+    _CORRUPT_ERRORS += (lz4.block.LZ4BlockError,)
+
+_HEADER = struct.Struct("!3sBB")
+_SECTIONS = struct.Struct("!III")
+_RECORD = struct.Struct("!BdII")
+
+
+class _MetadataBlock:
+    """
+    Metadata of every result in one cache entry, parsed on first access
+    """
+    __slots__ = ("raw", "decoded")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self.decoded = None
+
+    def get(self, index: int) -> Dict[str, Any]:
+        if self.decoded is None:
+            self.decoded = json.loads(self.raw)
+            self.raw = None
+        return self.decoded[index]
+
+
+class CachedSearchResult(VectorSearchResult):
+    """
+    VectorSearchResult decoded from the binary cache. Metadata JSON is only
+    parsed on first access so a cache hit does not pay for it upfront;
+    equality and dataclasses.asdict behave as for the base dataclass.
+    """
+    __slots__ = ("_metadata", "_block", "_index", "_flags")
+
+    def __init__(
+        self,
+        id: str,
+        score: float,
+        text: str,
+        block: _MetadataBlock,
+        index: int,
+        flags: int = 0
+    ):
+        self.id = id
+        self.score = score
+        self.text = text
+        self._metadata = None
+        self._block = block
+        self._index = index
+        self._flags = flags
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        if self._metadata is None:
+            metadata = dict(self._block.get(self._index))
+            if self._flags & FLAG_TEXT_IN_METADATA:
+                metadata["text"] = self.text
+            self._metadata = metadata
+            self._block = None
+        return self._metadata
+
+    @metadata.setter
+    def metadata(self, value: Dict[str, Any]):
+        self._metadata = value
+        self._block = None
+
+    def __eq__(self, other):
+        if not isinstance(other, VectorSearchResult):
+            return NotImplemented
+        return (
+            (self.id, self.score, self.metadata, self.text)
+            == (other.id, other.score, other.metadata, other.text)
+        )
+
+    __hash__ = None
+
+
+def _compress(payload: bytes, codec: int) -> bytes:
+    if codec == CODEC_LZ4:
+        return lz4.block.compress(payload, store_size=True)
+    if codec == CODEC_ZLIB:
+        return zlib.compress(payload, ZLIB_LEVEL)
+    if codec == CODEC_NONE:
+        return payload
+    raise ValueError(f"Unknown cache codec: {codec}")
+
+
+def _decompress(payload: memoryview, codec: int) -> Optional[bytes]:
+    if codec == CODEC_LZ4:
+        return lz4.block.decompress(payload) if lz4 is not None else None
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(payload)
+    if codec == CODEC_NONE:
+        return bytes(payload)
+    return None
+
+
+def encode_results(
+    results: List[VectorSearchResult],
+    codec: int = DEFAULT_CODEC
+) -> bytes:
+    """
+    Encode search results into the compressed binary cache format
+    """
+    records = []
+    strings = []
+    metadata_list = []
+    for r in results:
+        metadata = r.metadata or {}
+        text = r.text or ""
+        flags = 0
+        if "text" in metadata and metadata["text"] == text:
+            metadata = {k: v for k, v in metadata.items() if k != "text"}
+            flags |= FLAG_TEXT_IN_METADATA
+
+        records.append(_RECORD.pack(flags, r.score, len(r.id), len(text)))
+        strings.append(r.id)
+        strings.append(text)
+        metadata_list.append(metadata)
+
+    strings_bytes = "".join(strings).encode()
+    metadata_bytes = json.dumps(metadata_list, separators=(",", ":")).encode()
+    payload = b"".join([
+        _SECTIONS.pack(len(results), len(strings_bytes), len(metadata_bytes)),
+        *records,
+        strings_bytes,
+        metadata_bytes
+    ])
+    return _HEADER.pack(CACHE_MAGIC, CACHE_VERSION, codec) + _compress(payload, codec)
+
+
+def decode_results(data: bytes) -> Optional[List[CachedSearchResult]]:
+    """
+    Decode a binary cache entry. Returns None when the entry was written
+    with an unknown format version or codec, or is corrupt, so the caller
+    can treat it as a miss.
+    """
+    try:
+        return _decode_records(data)
+    except _CORRUPT_ERRORS:
+        return None
+
+
+def _decode_records(data: bytes) -> Optional[List[CachedSearchResult]]:
+    magic, version, codec = _HEADER.unpack_from(data)
+    if magic != CACHE_MAGIC or version != CACHE_VERSION:
+        return None
+
+    buf = _decompress(memoryview(data)[_HEADER.size:], codec)
+    if buf is None:
+        return None
+
+    count, strings_len, metadata_len = _SECTIONS.unpack_from(buf)
+    records_end = _SECTIONS.size + count * _RECORD.size
+    strings_end = records_end + strings_len
+    if strings_end + metadata_len != len(buf):
+        raise struct.error("truncated cache entry")
+
+    strings = str(buf[records_end:strings_end], "utf-8")
+    block = _MetadataBlock(buf[strings_end:])
+
+    results = []
+    offset = 0
+    records = _RECORD.iter_unpack(buf[_SECTIONS.size:records_end])
+    for index, (flags, score, id_len, text_len) in enumerate(records):
+        id_end = offset + id_len
+        text_end = id_end + text_len
+        results.append(CachedSearchResult(
+            strings[offset:id_end],
+            score,
+            strings[id_end:text_end],
+            block,
+            index,
+            flags
+        ))
+        offset = text_end
+
+    if offset != len(strings):
+        raise struct.error("inconsistent cache entry")
+    return results
+
+
+def is_binary_entry(data: Union[bytes, str]) -> bool:
+    return isinstance(data, (bytes, bytearray)) and data[:len(CACHE_MAGIC)] == CACHE_MAGIC
+
+
+def decode_cache_entry(data: Union[bytes, str]) -> Optional[List[VectorSearchResult]]:
+    """
+    Decode a cache entry in either the binary format or the legacy JSON
+    format written before it. None means the entry is unreadable.
+    """
+    if is_binary_entry(data):
+        return decode_results(data)
+
+    try:
+        return [VectorSearchResult(**r) for r in json.loads(data)]
+    except (ValueError, TypeError):
+        return None
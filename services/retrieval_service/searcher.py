@@ -1,15 +1,23 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union, TYPE_CHECKING
 import redis.asyncio as redis
 import json
 import hashlib
-from ..embedding_service.generator import EmbeddingGenerator
 from ..embedding_service.vector_store import VectorStore, VectorSearchResult
+from .result_cache import encode_results, decode_cache_entry
+
+if TYPE_CHECKING:
+    from ..embedding_service.generator import EmbeddingGenerator
+
+# Binary entries live under their own key prefix so workers still on the
+# JSON format never read them during a rolling deploy
+CACHE_KEY_PREFIX = "search:v2:"
+LEGACY_CACHE_KEY_PREFIX = "search:"
 
 class SemanticSearcher:
     def __init__(
         self,
         vector_store: VectorStore,
-        embedding_generator: EmbeddingGenerator,
+        embedding_generator: "EmbeddingGenerator",
         redis_client: redis.Redis
     ):
         self.vector_store = vector_store
@@ -27,13 +35,22 @@ class SemanticSearcher:
         """
         Perform semantic search with caching
         """
-        # Check cache
+        # Check cache, falling back to the entry a legacy worker wrote
         if use_cache:
             cache_key = self._get_cache_key(query, top_k, filters)
-            cached_result = await self.cache.get(cache_key)
+            legacy_key = self._get_cache_key(
+                query, top_k, filters, prefix=LEGACY_CACHE_KEY_PREFIX
+            )
+            
+            pipe = self.cache.pipeline(transaction=False)
+            pipe.get(cache_key)
+            pipe.get(legacy_key)
             
-            if cached_result:
-                return self._deserialize_results(cached_result)
+            for cached_result in await pipe.execute():
+                if cached_result:
+                    results = self._deserialize_results(cached_result)
+                    if results is not None:
+                        return results
         
         # Generate query embedding
         query_embedding = await self.embedding_generator.generate_embeddings([query])
@@ -74,28 +91,25 @@ class SemanticSearcher:
         self,
         query: str,
         top_k: int,
-        filters: Optional[Dict]
+        filters: Optional[Dict],
+        prefix: str = CACHE_KEY_PREFIX
     ) -> str:
         """
         Generate cache key for query
         """
         key_data = f"{query}_{top_k}_{json.dumps(filters or {})}"
-        return f"search:{hashlib.md5(key_data.encode()).hexdigest()}"
+        return f"{prefix}{hashlib.md5(key_data.encode()).hexdigest()}"
     
-    def _serialize_results(self, results: List[VectorSearchResult]) -> str:
-        return json.dumps([
-            {
-                "id": r.id,
-                "score": r.score,
-                "metadata": r.metadata,
-                "text": r.text
-            }
-            for r in results
-        ])
+    def _serialize_results(self, results: List[VectorSearchResult]) -> bytes:
+        return encode_results(results)
     
-    def _deserialize_results(self, data: str) -> List[VectorSearchResult]:
-        results_data = json.loads(data)
-        return [
-            VectorSearchResult(**r)
-            for r in results_data
-        ]
+    def _deserialize_results(
+        self,
+        data: Union[bytes, str]
+    ) -> Optional[List[VectorSearchResult]]:
+        """
+        Decode a cache entry, accepting both the binary format and legacy
+        JSON entries written before it. None means the entry is unreadable
+        and should be treated as a cache miss.
+        """
+        return decode_cache_entry(data)
@@ -0,0 +1,246 @@
+import random
+import tracemalloc
+import numpy as np
+import pytest
+from services.document_processor.deduplicator import (
+    InMemoryLSHIndex,
+    MinHasher,
+    NearDuplicateDetector,
+    RedisLSHIndex,
+    merge_signatures,
+    partition_duplicates,
+)
+
+WORDS = [f"w{i}" for i in range(20000)]
+
+
+def _document(rng, length=300):
+    return rng.choices(WORDS, k=length)
+
+
+def _edit(tokens, rng, edits):
+    edited = list(tokens)
+    for i in rng.sample(range(len(tokens)), edits):
+        edited[i] = f"edit{rng.random()}"
+    return edited
+
+
+def _ingest(detector, item_id, text, namespace="chunk"):
+    """
+    Look an item up and register it if it is new, as after a successful upsert
+    """
+    (fingerprint,) = detector.find_duplicates(
+        [(item_id, detector.signature(text))], namespace
+    )
+    if fingerprint.duplicate_of is None:
+        detector.register([fingerprint], namespace)
+    return fingerprint.duplicate_of
+
+
+def test_band_layout_favours_recall_at_threshold():
+    detector = NearDuplicateDetector(threshold=0.85, num_perm=128)
+    b, r = detector.bands, detector.rows
+
+    assert b * r <= 128
+    assert 1 - (1 - 0.85 ** r) ** b >= 0.9
+    assert 1 - (1 - 0.9 ** r) ** b >= 0.99
+
+
+def test_candidate_recall_at_threshold():
+    # 5 of 300 tokens edited gives Jaccard ~0.85 over 5-token shingles
+    hits = 0
+    for seed in range(200):
+        rng = random.Random(seed)
+        detector = NearDuplicateDetector(threshold=0.85)
+        tokens = _document(rng)
+        _ingest(detector, "orig", " ".join(tokens))
+
+        signature = detector.signature(" ".join(_edit(tokens, rng, 5)))
+        (candidates,) = detector.index.get_candidates("chunk", [detector._band_keys(signature)])
+        hits += "orig" in candidates
+
+    assert hits / 200 >= 0.85
+
+
+def test_detects_light_revisions():
+    # 3 of 300 tokens edited gives Jaccard ~0.9
+    hits = 0
+    for seed in range(200):
+        rng = random.Random(seed)
+        detector = NearDuplicateDetector(threshold=0.85)
+        tokens = _document(rng)
+        _ingest(detector, "orig", " ".join(tokens))
+        hits += _ingest(detector, "copy", " ".join(_edit(tokens, rng, 3))) == "orig"
+
+    assert hits / 200 >= 0.93
+
+
+def test_unrelated_documents_are_not_linked():
+    rng = random.Random(0)
+    detector = NearDuplicateDetector()
+
+    for i in range(200):
+        assert _ingest(detector, f"doc-{i}", " ".join(_document(rng))) is None
+
+
+def test_empty_text_and_reingest_are_not_duplicates():
+    detector = NearDuplicateDetector()
+    text = " ".join(_document(random.Random(1)))
+
+    assert _ingest(detector, "empty", "") is None
+    assert _ingest(detector, "doc", text) is None
+    assert _ingest(detector, "doc", text) is None
+    assert _ingest(detector, "copy", text) == "doc"
+
+
+def test_lookup_does_not_register():
+    detector = NearDuplicateDetector()
+    text = " ".join(_document(random.Random(2)))
+
+    detector.find_duplicates([("first", detector.signature(text))])
+    (fingerprint,) = detector.find_duplicates([("second", detector.signature(text))])
+
+    assert fingerprint.duplicate_of is None
+
+
+def test_duplicates_within_one_batch():
+    detector = NearDuplicateDetector()
+    text = " ".join(_document(random.Random(3)))
+    other = " ".join(_document(random.Random(4)))
+
+    fingerprints = detector.find_duplicates([
+        ("a", detector.signature(text)),
+        ("b", detector.signature(other)),
+        ("c", detector.signature(text)),
+        ("d", None),
+    ])
+
+    assert [fp.duplicate_of for fp in fingerprints] == [None, None, "a", None]
+
+
+def test_namespaces_are_separate():
+    detector = NearDuplicateDetector()
+    text = " ".join(_document(random.Random(5)))
+
+    assert _ingest(detector, "doc", text, namespace="document") is None
+    assert _ingest(detector, "chunk", text) is None
+
+
+def test_forgotten_item_is_replaced_by_next_copy():
+    detector = NearDuplicateDetector()
+    text = " ".join(_document(random.Random(6)))
+
+    _ingest(detector, "missing", text)
+    detector.forget(["missing"])
+
+    assert _ingest(detector, "replacement", text) is None
+    assert _ingest(detector, "copy", text) == "replacement"
+
+
+def test_signature_bits_validated():
+    with pytest.raises(ValueError):
+        NearDuplicateDetector(signature_bits=12)
+
+
+def test_blocked_signature_matches_single_pass():
+    text = " ".join(_document(random.Random(7), length=5000))
+
+    assert np.array_equal(
+        MinHasher(block_size=64).signature(text),
+        MinHasher(block_size=10 ** 6).signature(text)
+    )
+
+
+def test_signature_memory_is_bounded():
+    text = " ".join(_document(random.Random(8), length=50000))
+    hasher = MinHasher()
+
+    tracemalloc.start()
+    hasher.signature(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # A single-pass 50000 x 128 uint64 matrix alone would be ~51 MB
+    assert peak < 15 * 1024 * 1024
+
+
+def test_merged_chunk_signatures_match_document():
+    detector = NearDuplicateDetector()
+    tokens = _document(random.Random(9), length=1000)
+    chunks = [" ".join(tokens[i:i + 200]) for i in range(0, 1000, 180)]
+
+    merged = merge_signatures([detector.signature(c) for c in chunks])
+    whole = detector.signature(" ".join(tokens))
+
+    assert np.mean(merged == whole) >= 0.95
+    assert merge_signatures([]) is None
+
+
+def test_in_memory_bucket_keeps_more_than_first_item():
+    index = InMemoryLSHIndex(max_bucket_size=2)
+    index.add("chunk", [(item_id, [b"key"], b"sig") for item_id in ("a", "b", "c")])
+
+    assert index.get_candidates("chunk", [[b"key"]]) == [["a", "b"]]
+
+
+def test_partition_duplicates():
+    unique = {"chunk_id": "a", "metadata": {}}
+    duplicate = {"chunk_id": "b", "metadata": {"duplicate_of": "a"}}
+
+    assert partition_duplicates([unique, duplicate]) == ([unique], [duplicate])
+
+
+@pytest.fixture
+def redis_index():
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisLSHIndex(fakeredis.FakeRedis(), shards=16)
+
+
+def test_redis_index_detects_duplicates(redis_index):
+    detector = NearDuplicateDetector(index=redis_index)
+    rng = random.Random(10)
+    tokens = _document(rng)
+
+    assert _ingest(detector, "orig", " ".join(tokens)) is None
+    assert _ingest(detector, "copy", " ".join(_edit(tokens, rng, 1))) == "orig"
+    assert redis_index.get_signatures("chunk", ["orig", "missing"])[1] is None
+
+
+def test_redis_index_batches_round_trips(redis_index):
+    detector = NearDuplicateDetector(index=redis_index)
+    rng = random.Random(11)
+    texts = [" ".join(_document(rng, length=150)) for _ in range(20)]
+    for i, text in enumerate(texts[:10]):
+        _ingest(detector, f"indexed-{i}", text)
+    items = [(f"chunk-{i}", detector.signature(t)) for i, t in enumerate(texts)]
+
+    executed = []
+    pipeline = redis_index.redis.pipeline
+
+    def counting_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+        pipe.execute = lambda *a, **kw: executed.append(1) or execute(*a, **kw)
+        return pipe
+
+    redis_index.redis.pipeline = counting_pipeline
+    fingerprints = detector.find_duplicates(items)
+    assert len(executed) == 2
+    assert [fp.duplicate_of for fp in fingerprints[:10]] == [f"indexed-{i}" for i in range(10)]
+
+    detector.register([fp for fp in fingerprints if fp.duplicate_of is None])
+    assert len(executed) == 3
+
+
+def test_redis_index_takes_over_forgotten_claims(redis_index):
+    detector = NearDuplicateDetector(index=redis_index)
+    text = " ".join(_document(random.Random(12)))
+
+    _ingest(detector, "missing", text)
+    detector.forget(["missing"])
+    assert _ingest(detector, "replacement", text) is None
+
+    band_keys = detector._band_keys(detector.signature(text))
+    (owners,) = redis_index.get_candidates("chunk", [band_keys])
+    assert set(owners) == {"replacement"}
+    assert _ingest(detector, "copy", text) == "replacement"
@@ -0,0 +1,110 @@
+import asyncio
+import random
+import numpy as np
+import pytest
+from services.document_processor.chunker import IntelligentChunker
+from services.document_processor.deduplicator import NearDuplicateDetector
+from services.document_processor.processor import DocumentProcessor
+from services.embedding_service.vector_store import VectorStore
+
+WORDS = [f"w{i}" for i in range(20000)]
+
+
+class FakePineconeIndex:
+    def __init__(self):
+        self.vectors = {}
+        self.fail_upserts = False
+
+    def upsert(self, vectors, namespace=None):
+        if self.fail_upserts:
+            raise RuntimeError("upsert failed")
+        for vector in vectors:
+            self.vectors[vector["id"]] = vector
+
+    def fetch(self, ids, namespace=None):
+        return {"vectors": {i: self.vectors[i] for i in ids if i in self.vectors}}
+
+    def update(self, id, set_metadata, namespace=None):
+        self.vectors[id]["metadata"].update(set_metadata)
+
+
+class StubEmbeddingGenerator:
+    def __init__(self):
+        self.texts = []
+
+    async def generate_embeddings(self, texts):
+        self.texts.extend(texts)
+        return [np.zeros(3) for _ in texts]
+
+
+@pytest.fixture
+def processor():
+    vector_store = VectorStore.__new__(VectorStore)
+    vector_store.index = FakePineconeIndex()
+    return DocumentProcessor(
+        chunker=IntelligentChunker(chunk_size=500, chunk_overlap=50),
+        embedding_generator=StubEmbeddingGenerator(),
+        vector_store=vector_store,
+        deduplicator=NearDuplicateDetector(),
+        s3_client=object(),
+    )
+
+
+def _text(seed, words=600):
+    return " ".join(random.Random(seed).choices(WORDS, k=words))
+
+
+def _ingest(processor, doc_id, text):
+    return asyncio.run(processor.process_text(doc_id, text))
+
+
+def test_copy_is_linked_instead_of_embedded(processor):
+    text = _text(0)
+    first = _ingest(processor, "doc-1", text)
+    embedded = len(processor.embedding_generator.texts)
+
+    second = _ingest(processor, "doc-2", text)
+
+    assert first["duplicates"] == 0
+    assert second["duplicates"] == second["chunks"]
+    assert len(processor.embedding_generator.texts) == embedded
+
+    vectors = processor.vector_store.index.vectors
+    assert all(v["metadata"]["document_id"] == "doc-1" for v in vectors.values())
+    assert all(v["metadata"]["duplicate_document_ids"] == ["doc-2"] for v in vectors.values())
+
+
+def test_failed_upsert_registers_nothing(processor):
+    text = _text(1)
+    processor.vector_store.index.fail_upserts = True
+    with pytest.raises(RuntimeError):
+        _ingest(processor, "doc-1", text)
+    processor.vector_store.index.fail_upserts = False
+
+    result = _ingest(processor, "doc-2", text)
+
+    assert result["duplicates"] == 0
+    assert _ingest(processor, "doc-3", text)["duplicates"] == result["chunks"]
+
+
+def test_missing_target_is_replaced(processor):
+    text = _text(2)
+    _ingest(processor, "doc-1", text)
+    processor.vector_store.index.vectors.clear()
+
+    result = _ingest(processor, "doc-2", text)
+    vectors = processor.vector_store.index.vectors
+
+    assert result["duplicates"] == 0
+    assert len(vectors) == result["chunks"]
+    assert not any("duplicate_of" in v["metadata"] for v in vectors.values())
+    assert _ingest(processor, "doc-3", text)["duplicates"] == result["chunks"]
+
+
+def test_repeated_chunks_within_a_document(processor):
+    paragraph = _text(3, words=60)
+    result = _ingest(processor, "doc-1", "\n\n".join([paragraph] * 4))
+
+    assert result["chunks"] == 4
+    assert result["duplicates"] == 3
+    assert len(processor.vector_store.index.vectors) == 1
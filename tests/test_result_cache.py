@@ -0,0 +1,151 @@
+import asyncio
+import dataclasses
+import json
+import numpy as np
+import pytest
+from services.embedding_service.vector_store import VectorSearchResult
+from services.retrieval_service.result_cache import (
+    CACHE_MAGIC,
+    CODEC_LZ4,
+    CODEC_NONE,
+    CODEC_ZLIB,
+    CachedSearchResult,
+    decode_cache_entry,
+    decode_results,
+    encode_results,
+    is_binary_entry,
+    lz4,
+)
+from services.retrieval_service.searcher import LEGACY_CACHE_KEY_PREFIX, SemanticSearcher
+
+CODECS = [CODEC_NONE, CODEC_ZLIB] + ([CODEC_LZ4] if lz4 is not None else [])
+
+
+def _results():
+    return [
+        VectorSearchResult(
+            id=f"chunk-{i}",
+            score=0.9 - i / 100,
+            metadata={"document_id": "doc-1", "chunk_index": i, "text": f"héllo {i}"},
+            text=f"héllo {i}",
+        )
+        for i in range(5)
+    ] + [VectorSearchResult(id="empty", score=0.1, metadata={}, text="")]
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_binary_round_trip(codec):
+    results = _results()
+    decoded = decode_results(encode_results(results, codec))
+
+    assert all(isinstance(r, CachedSearchResult) for r in decoded)
+    assert decoded == results
+    assert [dataclasses.asdict(r) for r in decoded] == [dataclasses.asdict(r) for r in results]
+
+
+def test_results_have_no_instance_dict():
+    decoded = decode_results(encode_results(_results()))
+
+    assert not hasattr(decoded[0], "__dict__")
+    assert not hasattr(_results()[0], "__dict__")
+
+
+def test_text_is_stored_once():
+    results = _results()
+    data = encode_results(results, CODEC_NONE)
+
+    assert data.count("héllo 3".encode()) == 1
+    assert decode_results(data)[3].metadata["text"] == "héllo 3"
+
+
+def test_legacy_json_entry_is_still_readable():
+    results = _results()
+    legacy = json.dumps([dataclasses.asdict(r) for r in results])
+
+    assert decode_cache_entry(legacy) == results
+    assert decode_cache_entry(legacy.encode()) == results
+
+
+def test_unknown_version_or_codec_is_a_miss():
+    data = bytearray(encode_results(_results()))
+    data[len(CACHE_MAGIC)] = 99
+    assert decode_cache_entry(bytes(data)) is None
+
+    data = bytearray(encode_results(_results()))
+    data[len(CACHE_MAGIC) + 1] = 99
+    assert decode_cache_entry(bytes(data)) is None
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_corrupt_entry_is_a_miss(codec):
+    data = encode_results(_results(), codec)
+
+    assert decode_cache_entry(data[:-5]) is None
+    assert decode_cache_entry(data[:len(CACHE_MAGIC) + 2] + b"garbage") is None
+    assert decode_cache_entry(b"not json") is None
+
+
+class StubEmbeddingGenerator:
+    async def generate_embeddings(self, texts):
+        return [np.zeros(3) for _ in texts]
+
+
+class StubVectorStore:
+    def __init__(self, results):
+        self.results = results
+        self.calls = 0
+
+    async def search(self, query_embedding, top_k=10, filter=None, namespace=None):
+        self.calls += 1
+        return list(self.results)
+
+
+@pytest.fixture
+def searcher():
+    fakeredis = pytest.importorskip("fakeredis")
+    return SemanticSearcher(
+        vector_store=StubVectorStore(_results()),
+        embedding_generator=StubEmbeddingGenerator(),
+        redis_client=fakeredis.FakeAsyncRedis(),
+    )
+
+
+def _legacy_key(searcher):
+    return searcher._get_cache_key("query", 10, None, prefix=LEGACY_CACHE_KEY_PREFIX)
+
+
+def test_search_serves_legacy_entry_from_cache(searcher):
+    legacy = json.dumps([dataclasses.asdict(r) for r in _results()[:2]])
+    asyncio.run(searcher.cache.set(_legacy_key(searcher), legacy))
+
+    results = asyncio.run(searcher.search("query"))
+
+    assert results == _results()[:2]
+    assert searcher.vector_store.calls == 0
+
+
+def test_search_writes_binary_entry_under_versioned_key(searcher):
+    asyncio.run(searcher.search("query"))
+    cache_key = searcher._get_cache_key("query", 10, None)
+
+    assert cache_key != _legacy_key(searcher)
+    assert is_binary_entry(asyncio.run(searcher.cache.get(cache_key)))
+    assert asyncio.run(searcher.cache.get(_legacy_key(searcher))) is None
+
+    assert asyncio.run(searcher.search("query")) == _results()
+    assert searcher.vector_store.calls == 1
+
+
+@pytest.mark.parametrize("entry", [
+    lambda: encode_results(_results())[:-5],
+    lambda: CACHE_MAGIC + bytes([99, CODEC_NONE]) + b"payload",
+])
+def test_unreadable_entry_falls_through_and_is_rewritten(searcher, entry):
+    cache_key = searcher._get_cache_key("query", 10, None)
+    asyncio.run(searcher.cache.set(cache_key, entry()))
+
+    results = asyncio.run(searcher.search("query"))
+
+    assert results == _results()
+    assert searcher.vector_store.calls == 1
+    assert decode_results(asyncio.run(searcher.cache.get(cache_key))) == _results()